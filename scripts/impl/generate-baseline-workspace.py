@@ -1,35 +1,166 @@
 #!/usr/bin/env python3
 import argparse
+import datetime
 import json
 import os
 import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+# orjson is an optional speedup: the harness runs on stock CI runners
+# where only the stdlib is guaranteed, so fall back to `json` when the
+# wheel is not installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Likewise, `cryptography` lets us mint the per-service cert pairs
+# in-process instead of forking `openssl req` for every service; keep the
+# subprocess path for runners that lack the package.
+try:
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+    from cryptography.x509.oid import NameOID
+except ImportError:
+    x509 = None
+
 DOMAIN = "trusted.domain"
 DEFAULT_OPENBAO_URL = "http://127.0.0.1:8200"
 DEFAULT_KV_MOUNT = "secret"
+# Leaf key algorithms: RSA-2048 mirrors production, Ed25519 (--fast-keys)
+# is far cheaper to generate for one-day smoke-test certs.
+KEY_TYPE_RSA = "rsa"
+KEY_TYPE_ED25519 = "ed25519"
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Generate baseline docker harness workspace")
     parser.add_argument("--scenario-file", required=True)
     parser.add_argument("--artifact-dir", required=True)
-    return parser.parse_args()
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="worker processes for cert generation (1 disables the pool)",
+    )
+    parser.add_argument(
+        "--reuse-keys",
+        action="store_true",
+        help="share a pool of --jobs private keys across services instead of one per service",
+    )
+    parser.add_argument(
+        "--fast-keys",
+        action="store_true",
+        help="issue Ed25519 instead of RSA-2048 keys for harness certs",
+    )
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    return args
+
+
+def dump_json(payload: object) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode("utf-8")
+
+
+def write_json_file(path: str | Path, payload: object) -> None:
+    """Writes `payload` as indented JSON. The stdlib fallback streams
+    through `json.dump` so a large layout never exists as one string
+    alongside the dict it was built from."""
+    if orjson is not None:
+        with open(path, "wb") as fh:
+            fh.write(orjson.dumps(payload, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh, indent=2)
+
+
+def write_private_file(path: str | Path, data: bytes) -> None:
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+def generate_private_key_pem(key_type: str = KEY_TYPE_RSA) -> bytes:
+    if x509 is not None:
+        if key_type == KEY_TYPE_ED25519:
+            key = ed25519.Ed25519PrivateKey.generate()
+        else:
+            key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        return key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    if key_type == KEY_TYPE_ED25519:
+        cmd = ["openssl", "genpkey", "-algorithm", "ED25519"]
+    else:
+        cmd = ["openssl", "genpkey", "-algorithm", "RSA", "-pkeyopt", "rsa_keygen_bits:2048"]
+    return subprocess.run(cmd, check=True, capture_output=True).stdout
+
 
+def make_self_signed(
+    dns_name: str, key_pem: bytes | None = None, key_type: str = KEY_TYPE_RSA
+) -> tuple[bytes, bytes]:
+    """Returns a PEM-encoded (key, cert) pair for a one-day self-signed
+    leaf whose CN and DNS SAN are `dns_name`, matching what the
+    `openssl req` fallback in `ensure_cert_pair` produces. A fresh
+    `key_type` key is generated unless `key_pem` supplies one."""
+    if key_pem is None:
+        key_pem = generate_private_key_pem(key_type)
+    key = serialization.load_pem_private_key(key_pem, password=None)
+    # Ed25519 signs the message directly; passing a digest is an error.
+    algorithm = None if isinstance(key, ed25519.Ed25519PrivateKey) else hashes.SHA256()
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, dns_name)])
+    now = datetime.datetime.now(datetime.UTC)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName(dns_name)]), critical=False)
+        .sign(key, algorithm)
+    )
+    return key_pem, cert.public_bytes(serialization.Encoding.PEM)
 
-def ensure_cert_pair(work_dir: Path, service_name: str, hostname: str, instance_id: str) -> None:
+
+def ensure_cert_pair(
+    work_dir: Path,
+    service_name: str,
+    hostname: str,
+    instance_id: str,
+    key_pem: bytes | None = None,
+    key_type: str = KEY_TYPE_RSA,
+) -> None:
     cert_path = work_dir / "certs" / f"{service_name}.crt"
     key_path = work_dir / "certs" / f"{service_name}.key"
     dns_name = f"{instance_id}.{service_name}.{hostname}.{DOMAIN}"
+    if x509 is not None:
+        key_pem, cert_pem = make_self_signed(dns_name, key_pem, key_type)
+        write_private_file(key_path, key_pem)
+        write_private_file(cert_path, cert_pem)
+        return
+    if key_pem is None:
+        newkey = "ed25519" if key_type == KEY_TYPE_ED25519 else "rsa:2048"
+        key_args = ["-newkey", newkey, "-keyout", str(key_path)]
+    else:
+        write_private_file(key_path, key_pem)
+        key_args = ["-key", str(key_path)]
     cmd = [
         "openssl",
         "req",
         "-x509",
         "-nodes",
-        "-newkey",
-        "rsa:2048",
-        "-keyout",
-        str(key_path),
+        *key_args,
         "-out",
         str(cert_path),
         "-days",
@@ -44,6 +175,39 @@ def ensure_cert_pair(work_dir: Path, service_name: str, hostname: str, instance_
     os.chmod(key_path, 0o600)
 
 
+def run_in_processes(func, jobs: list[tuple], max_workers: int) -> list:
+    """Returns `func(*job)` for every job, in order. Keygen is CPU-bound
+    and independent per job, so fan out across processes unless the
+    caller asked for a single worker."""
+    if max_workers <= 1 or len(jobs) <= 1:
+        return [func(*job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+        futures = [pool.submit(func, *job) for job in jobs]
+        for future in as_completed(futures):
+            future.result()
+        return [future.result() for future in futures]
+
+
+def generate_key_pool(size: int, max_workers: int, key_type: str) -> list[bytes]:
+    return run_in_processes(generate_private_key_pem, [(key_type,)] * size, max_workers)
+
+
+def generate_cert_pairs(
+    jobs: list[tuple[Path, str, str, str]],
+    max_workers: int,
+    key_pool: list[bytes] | None = None,
+    key_type: str = KEY_TYPE_RSA,
+) -> None:
+    """Runs `ensure_cert_pair` for every job. With a `key_pool`, services
+    take keys from it round-robin so only the cert is minted per
+    service."""
+    jobs = [
+        (*job, key_pool[index % len(key_pool)] if key_pool else None, key_type)
+        for index, job in enumerate(jobs)
+    ]
+    run_in_processes(ensure_cert_pair, jobs, max_workers)
+
+
 def write_bootroot_agent_stub(node_bin_dir: Path) -> None:
     node_bin_dir.mkdir(parents=True, exist_ok=True)
     stub = node_bin_dir / "bootroot-agent"
@@ -63,18 +227,32 @@ def main() -> None:
         "nodes": [],
         "services": [],
     }
+    cert_jobs: list[tuple[Path, str, str, str]] = []
 
     for node in scenario["nodes"]:
         node_id = node["id"]
         hostname = node_id
         work_dir = artifact_dir / "nodes" / node_id
-        (work_dir / "certs").mkdir(parents=True, exist_ok=True)
-        (work_dir / "configs").mkdir(parents=True, exist_ok=True)
+        # Layout entries only need strings, so build them by concatenation
+        # from one fspath() per node instead of a Path per field.
+        work_dir_str = os.fspath(work_dir)
+        state_path_str = f"{work_dir_str}/state.json"
+        # Create every directory the node needs up front rather than
+        # re-running mkdir(parents=True) for each service. 0700 matches
+        # the mode bootroot itself uses for secrets directories.
+        node_dirs = {
+            f"{work_dir_str}/certs",
+            f"{work_dir_str}/configs",
+            f"{work_dir_str}/summaries",
+            *(f"{work_dir_str}/secrets/services/{s['service_name']}" for s in node["services"]),
+        }
+        for node_dir in node_dirs:
+            os.makedirs(node_dir, mode=0o700, exist_ok=True)
 
         state_services = {}
         layout_node = {
             "node_id": node_id,
-            "work_dir": str(work_dir),
+            "work_dir": work_dir_str,
             "services": [],
         }
 
@@ -82,46 +260,42 @@ def main() -> None:
             service_name = service["service_name"]
             instance_id = service["instance_id"]
 
-            secret_dir = work_dir / "secrets" / "services" / service_name
-            secret_dir.mkdir(parents=True, exist_ok=True)
-
-            role_id_path = secret_dir / "role_id"
-            secret_id_path = secret_dir / "secret_id"
-            eab_file_path = secret_dir / "eab.json"
-            agent_config_path = work_dir / "configs" / f"{service_name}.toml"
-            ca_bundle_path = work_dir / "certs" / f"{service_name}-ca-bundle.pem"
-            summary_json_path = work_dir / "summaries" / f"{service_name}.json"
-            summary_json_path.parent.mkdir(parents=True, exist_ok=True)
-
-            role_id_path.write_text(f"role-{service_name}\n", encoding="utf-8")
-            secret_id_path.write_text(f"seed-secret-{service_name}\n", encoding="utf-8")
-            eab_file_path.write_text(
-                json.dumps(
-                    {"kid": f"seed-kid-{service_name}", "hmac": f"seed-hmac-{service_name}"}
-                ),
-                encoding="utf-8",
+            # Strings shared between the secret files, state.json, and
+            # layout.json are formatted once per service.
+            secret_rel = f"secrets/services/{service_name}"
+            agent_config_rel = f"configs/{service_name}.toml"
+            role_id = f"role-{service_name}"
+            approle_name = f"bootroot-service-{service_name}"
+
+            secret_dir = f"{work_dir_str}/{secret_rel}"
+            role_id_path = f"{secret_dir}/role_id"
+            secret_id_path = f"{secret_dir}/secret_id"
+            eab_file_path = f"{secret_dir}/eab.json"
+
+            write_private_file(role_id_path, f"{role_id}\n".encode())
+            write_private_file(secret_id_path, f"seed-secret-{service_name}\n".encode())
+            write_private_file(
+                eab_file_path,
+                dump_json({"kid": f"seed-kid-{service_name}", "hmac": f"seed-hmac-{service_name}"}),
             )
-            os.chmod(role_id_path, 0o600)
-            os.chmod(secret_id_path, 0o600)
-            os.chmod(eab_file_path, 0o600)
 
-            ensure_cert_pair(work_dir, service_name, hostname, instance_id)
+            cert_jobs.append((work_dir, service_name, hostname, instance_id))
 
             state_services[service_name] = {
                 "service_name": service_name,
                 "delivery_mode": "remote-bootstrap",
                 "hostname": hostname,
                 "domain": DOMAIN,
-                "agent_config_path": f"configs/{service_name}.toml",
+                "agent_config_path": agent_config_rel,
                 "cert_path": f"certs/{service_name}.crt",
                 "key_path": f"certs/{service_name}.key",
                 "instance_id": instance_id,
                 "notes": None,
                 "approle": {
-                    "role_name": f"bootroot-service-{service_name}",
-                    "role_id": f"role-{service_name}",
-                    "secret_id_path": f"secrets/services/{service_name}/secret_id",
-                    "policy_name": f"bootroot-service-{service_name}",
+                    "role_name": approle_name,
+                    "role_id": role_id,
+                    "secret_id_path": f"{secret_rel}/secret_id",
+                    "policy_name": approle_name,
                 },
             }
 
@@ -131,14 +305,14 @@ def main() -> None:
                 "hostname": hostname,
                 "domain": DOMAIN,
                 "instance_id": instance_id,
-                "work_dir": str(work_dir),
-                "state_path": str(work_dir / "state.json"),
-                "role_id_path": str(role_id_path),
-                "secret_id_path": str(secret_id_path),
-                "eab_file_path": str(eab_file_path),
-                "agent_config_path": str(agent_config_path),
-                "ca_bundle_path": str(ca_bundle_path),
-                "summary_json_path": str(summary_json_path),
+                "work_dir": work_dir_str,
+                "state_path": state_path_str,
+                "role_id_path": role_id_path,
+                "secret_id_path": secret_id_path,
+                "eab_file_path": eab_file_path,
+                "agent_config_path": f"{work_dir_str}/{agent_config_rel}",
+                "ca_bundle_path": f"{work_dir_str}/certs/{service_name}-ca-bundle.pem",
+                "summary_json_path": f"{work_dir_str}/summaries/{service_name}.json",
             }
             layout["services"].append(layout_entry)
             layout_node["services"].append(layout_entry)
@@ -151,14 +325,16 @@ def main() -> None:
             "approles": {},
             "services": state_services,
         }
-        (work_dir / "state.json").write_text(
-            json.dumps(state_payload, indent=2),
-            encoding="utf-8",
-        )
+        write_json_file(state_path_str, state_payload)
         write_bootroot_agent_stub(work_dir / "bin")
         layout["nodes"].append(layout_node)
 
-    (artifact_dir / "layout.json").write_text(json.dumps(layout, indent=2), encoding="utf-8")
+    key_type = KEY_TYPE_ED25519 if args.fast_keys else KEY_TYPE_RSA
+    key_pool = None
+    if args.reuse_keys and cert_jobs:
+        key_pool = generate_key_pool(min(args.jobs, len(cert_jobs)), args.jobs, key_type)
+    generate_cert_pairs(cert_jobs, args.jobs, key_pool, key_type)
+    write_json_file(artifact_dir / "layout.json", layout)
 
 
 if __name__ == "__main__":
@@ -1,4 +1,6 @@
 #!/usr/bin/env python3
+import argparse
+import asyncio
 import base64
 import hashlib
 import json
@@ -6,21 +8,31 @@ import os
 import re
 import shutil
 import subprocess
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# orjson is an optional speedup: the harness runs on stock CI runners
+# where only the stdlib is guaranteed, so fall back to `json` when the
+# wheel is not installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 PORT = int(os.environ.get("MOCK_OPENBAO_PORT", "18200"))
 TOKEN = "mock-client-token"
+ASYNC_WORKERS = 64
 # Service / item names embed into filesystem paths (see TRUST_DIR
-# usage in synthetic_trust_anchor), so restrict the URL capture
-# groups to a path-safe alphabet rather than the looser `[^/]+`.
-# This rejects `..`, `/`, and any character that could escape the
-# `TRUST_DIR/<service>/` jail.
+# usage in synthetic_trust_anchor), so restrict the service segment of
+# SERVICE_PATH_PREFIX routes to a path-safe alphabet rather than
+# accepting anything up to the next `/`. This rejects `..`, `/`, and
+# any character that could escape the `TRUST_DIR/<service>/` jail.
 SAFE_NAME_RE = r"[A-Za-z0-9_-]+"
-SERVICE_PATH_PATTERN = re.compile(
-    rf"^/v1/secret/data/bootroot/services/({SAFE_NAME_RE})/({SAFE_NAME_RE})$"
-)
 SAFE_NAME_FULLMATCH = re.compile(rf"^{SAFE_NAME_RE}$")
-CONTROL_ITEMS = {"secret_id", "eab", "http_responder_hmac", "trust"}
+SERVICE_PATH_PREFIX = "/v1/secret/data/bootroot/services/"
+CONTROL_ITEMS = frozenset({"secret_id", "eab", "http_responder_hmac", "trust"})
 
 
 # Persist the synthetic CA material (cert + key) under this directory so
@@ -36,7 +48,7 @@ def _safe_name(value: str) -> str:
     SAFE_NAME alphabet so we cannot construct paths outside TRUST_DIR.
 
     The HTTP route and control-plane handlers already constrain
-    incoming service/item identifiers via SERVICE_PATH_PATTERN and
+    incoming service/item identifiers via SAFE_NAME_FULLMATCH and
     CONTROL_ITEMS, but inputs reaching this helper from arbitrary
     JSON payloads (`/control/*`) still need the same scrub.
     """
@@ -75,6 +87,15 @@ def _ca_file(versioned_dir: str, suffix: str) -> str:
 
 versions: dict[tuple[str, str], int] = {}
 fail_next: dict[tuple[str, str], int] = {}
+# Handlers run on per-connection threads, so every read-modify-write of
+# the shared state above and the body cache below goes through this
+# lock. It is never held while a body is built: a `trust` miss forks
+# openssl and would otherwise stall every other request.
+_state_lock = threading.Lock()
+# Trust generation writes `TRUST_DIR/<service>/`, so concurrent misses
+# for the same service serialize on a per-service lock instead.
+_trust_locks: dict[str, threading.Lock] = {}
+_trust_locks_guard = threading.Lock()
 # Cache real self-signed CA certs keyed by (service, version) so each
 # rotation cycle returns a *parseable* PEM with a matching DER SHA-256.
 # `bootroot verify` (issue #622) now bails when any fingerprint in
@@ -84,6 +105,11 @@ fail_next: dict[tuple[str, str], int] = {}
 _trust_cache: dict[tuple[str, int], tuple[str, str]] = {}
 
 
+def _trust_lock(service: str) -> threading.Lock:
+    with _trust_locks_guard:
+        return _trust_locks.setdefault(service, threading.Lock())
+
+
 def synthetic_trust_anchor(service: str, version: int) -> tuple[str, str]:
     """Generates a real self-signed CA cert PEM and its DER SHA-256.
 
@@ -105,69 +131,231 @@ def synthetic_trust_anchor(service: str, version: int) -> tuple[str, str]:
     cached = _trust_cache.get(key)
     if cached is not None:
         return cached
-    safe_version = int(version)
-    versioned_dir = _trust_subdir(service, f"v{safe_version}")
-    os.makedirs(versioned_dir, exist_ok=True)
-    cert_path = _ca_file(versioned_dir, "ca.crt")
-    key_path = _ca_file(versioned_dir, "ca.key")
-    config_path = _ca_file(versioned_dir, "openssl.cnf")
-    with open(config_path, "w", encoding="utf-8") as fh:
-        fh.write(
-            "[req]\n"
-            "distinguished_name=dn\n"
-            "x509_extensions=ext\n"
-            "prompt=no\n"
-            "[dn]\n"
-            f"CN=mock-trust-{_safe_name(service)}-v{safe_version}\n"
-            "[ext]\n"
-            "basicConstraints=critical,CA:TRUE\n"
-            "keyUsage=critical,keyCertSign,cRLSign\n"
+    with _trust_lock(service):
+        cached = _trust_cache.get(key)
+        if cached is not None:
+            return cached
+        safe_version = int(version)
+        versioned_dir = _trust_subdir(service, f"v{safe_version}")
+        os.makedirs(versioned_dir, exist_ok=True)
+        cert_path = _ca_file(versioned_dir, "ca.crt")
+        key_path = _ca_file(versioned_dir, "ca.key")
+        config_path = _ca_file(versioned_dir, "openssl.cnf")
+        with open(config_path, "w", encoding="utf-8") as fh:
+            fh.write(
+                "[req]\n"
+                "distinguished_name=dn\n"
+                "x509_extensions=ext\n"
+                "prompt=no\n"
+                "[dn]\n"
+                f"CN=mock-trust-{_safe_name(service)}-v{safe_version}\n"
+                "[ext]\n"
+                "basicConstraints=critical,CA:TRUE\n"
+                "keyUsage=critical,keyCertSign,cRLSign\n"
+            )
+        subprocess.run(
+            [
+                "openssl",
+                "req",
+                "-x509",
+                "-nodes",
+                "-newkey",
+                "rsa:2048",
+                "-keyout",
+                key_path,
+                "-out",
+                cert_path,
+                "-days",
+                "1",
+                "-config",
+                config_path,
+            ],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        with open(cert_path, encoding="utf-8") as fh:
+            pem = fh.read()
+        der = base64.b64decode(
+            "".join(line for line in pem.splitlines() if not line.startswith("-----"))
+        )
+        fingerprint = hashlib.sha256(der).hexdigest()
+        # Mirror the just-generated material into `<service>/current/` so
+        # the harness can blindly read the latest CA without tracking
+        # per-item versions on the bash side.
+        current_dir = _trust_subdir(service, "current")
+        os.makedirs(current_dir, exist_ok=True)
+        shutil.copyfile(cert_path, _ca_file(current_dir, "ca.crt"))
+        shutil.copyfile(key_path, _ca_file(current_dir, "ca.key"))
+        _trust_cache[key] = (pem, fingerprint)
+        return pem, fingerprint
+
+
+def load_json(raw: bytes) -> object:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+
+def dump_json(payload: object) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode("utf-8")
+
+
+# Responses that never vary are serialized once at import time.
+HEALTH_BODY = dump_json({"initialized": True, "sealed": False})
+LOGIN_BODY = dump_json({"auth": {"client_token": TOKEN}})
+NOT_FOUND_BODY = dump_json({"errors": ["not found"]})
+OK_BODY = dump_json({"ok": True})
+INVALID_CONTROL_BODY = dump_json({"error": "invalid control payload"})
+
+
+def write_body(handler: BaseHTTPRequestHandler, status: int, body: bytes) -> None:
+    # Emit the status line, headers, and body in one write instead of
+    # the separate header flush and body write that `send_response` /
+    # `end_headers` would issue.
+    handler.log_request(status)
+    handler.wfile.write(
+        b"%s %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%b"
+        % (
+            handler.protocol_version.encode("ascii"),
+            status,
+            handler.responses[status][0].encode("ascii"),
+            len(body),
+            body,
         )
-    subprocess.run(
-        [
-            "openssl",
-            "req",
-            "-x509",
-            "-nodes",
-            "-newkey",
-            "rsa:2048",
-            "-keyout",
-            key_path,
-            "-out",
-            cert_path,
-            "-days",
-            "1",
-            "-config",
-            config_path,
-        ],
-        check=True,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    )
-    with open(cert_path, encoding="utf-8") as fh:
-        pem = fh.read()
-    der = base64.b64decode(
-        "".join(line for line in pem.splitlines() if not line.startswith("-----"))
     )
-    fingerprint = hashlib.sha256(der).hexdigest()
-    # Mirror the just-generated material into `<service>/current/` so
-    # the harness can blindly read the latest CA without tracking
-    # per-item versions on the bash side.
-    current_dir = _trust_subdir(service, "current")
-    os.makedirs(current_dir, exist_ok=True)
-    shutil.copyfile(cert_path, _ca_file(current_dir, "ca.crt"))
-    shutil.copyfile(key_path, _ca_file(current_dir, "ca.key"))
-    _trust_cache[key] = (pem, fingerprint)
-    return pem, fingerprint
-
-
-def write_json(handler: BaseHTTPRequestHandler, status: int, payload: dict) -> None:
-    body = json.dumps(payload).encode("utf-8")
-    handler.send_response(status)
-    handler.send_header("Content-Type", "application/json")
-    handler.send_header("Content-Length", str(len(body)))
-    handler.end_headers()
-    handler.wfile.write(body)
+
+
+# Serialized secret responses keyed by (service, kind, version). The key
+# fully determines the body, so a hit skips both payload construction
+# and encoding.
+_body_cache: dict[tuple[str, str, int], bytes] = {}
+
+
+def _build_body(service: str, kind: str, version: int) -> bytes:
+    """Returns the serialized KV response for `kind`, which
+    `_service_route` has already checked against CONTROL_ITEMS."""
+    if kind == "secret_id":
+        data = {"secret_id": f"synced-secret-id-{service}-v{version}"}
+    elif kind == "eab":
+        data = {
+            "kid": f"synced-kid-{service}-v{version}",
+            "hmac": f"synced-hmac-{service}-v{version}",
+        }
+    elif kind == "http_responder_hmac":
+        data = {"hmac": f"synced-responder-hmac-{service}-v{version}"}
+    else:
+        pem, fingerprint = synthetic_trust_anchor(service, version)
+        data = {"trusted_ca_sha256": [fingerprint], "ca_bundle_pem": pem}
+    return dump_json({"data": {"data": data}})
+
+
+def _forget_bodies(service: str, item: str) -> None:
+    for key in [key for key in _body_cache if key[0] == service and key[1] == item]:
+        del _body_cache[key]
+
+
+def _service_route(path: str) -> tuple[str, str] | None:
+    """Splits a KV secret path into `(service, kind)`, or returns `None`
+    when it is not one the mock serves. A prefix check and split
+    replace the old full-path regex; the service name still goes
+    through SAFE_NAME_FULLMATCH because it ends up in TRUST_DIR paths."""
+    if not path.startswith(SERVICE_PATH_PREFIX):
+        return None
+    parts = path[len(SERVICE_PATH_PREFIX) :].split("/")
+    if len(parts) != 2:
+        return None
+    service, kind = parts
+    if kind not in CONTROL_ITEMS or not SAFE_NAME_FULLMATCH.fullmatch(service):
+        return None
+    return service, kind
+
+
+def _health(raw: bytes) -> tuple[int, bytes]:
+    return 200, HEALTH_BODY
+
+
+def _login(raw: bytes) -> tuple[int, bytes]:
+    return 200, LOGIN_BODY
+
+
+def _set_version(raw: bytes) -> tuple[int, bytes]:
+    payload = load_json(raw)
+    service = str(payload.get("service", "")).strip()
+    item = sys.intern(str(payload.get("item", "")).strip())
+    version = int(payload.get("version", 1))
+    if not service or item not in CONTROL_ITEMS or version < 1:
+        return 400, INVALID_CONTROL_BODY
+    with _state_lock:
+        versions[(service, item)] = version
+        _forget_bodies(service, item)
+    return 200, OK_BODY
+
+
+def _fail_next(raw: bytes) -> tuple[int, bytes]:
+    payload = load_json(raw)
+    service = str(payload.get("service", "")).strip()
+    item = sys.intern(str(payload.get("item", "")).strip())
+    count = int(payload.get("count", 1))
+    if not service or item not in CONTROL_ITEMS or count < 1:
+        return 400, INVALID_CONTROL_BODY
+    with _state_lock:
+        fail_next[(service, item)] = count
+    return 200, OK_BODY
+
+
+def _reset(raw: bytes) -> tuple[int, bytes]:
+    with _state_lock:
+        versions.clear()
+        fail_next.clear()
+        _body_cache.clear()
+    return 200, OK_BODY
+
+
+def _secret(service: str, kind: str) -> tuple[int, bytes]:
+    failure_key = (service, kind)
+    with _state_lock:
+        if fail_next.get(failure_key, 0) > 0:
+            fail_next[failure_key] = fail_next[failure_key] - 1
+            return 500, dump_json({"errors": [f"injected failure for {service}/{kind}"]})
+        key = (service, kind, versions.get(failure_key, 1))
+        body = _body_cache.get(key)
+    if body is None:
+        body = _build_body(*key)
+        # The key pins the version, so a set-version that raced the
+        # build cannot make this entry stale.
+        with _state_lock:
+            body = _body_cache.setdefault(key, body)
+    return 200, body
+
+
+# Exact-path routes; KV secret paths are matched by `_service_route`.
+GET_ROUTES = {"/v1/sys/health": _health}
+POST_ROUTES = {
+    "/v1/auth/approle/login": _login,
+    "/control/set-version": _set_version,
+    "/control/fail-next": _fail_next,
+    "/control/reset": _reset,
+}
+
+
+def dispatch(method: str, path: str, raw: bytes) -> tuple[int, bytes]:
+    """Returns the `(status, body)` response for a request. Shared by
+    the stdlib and aiohttp front ends so both serve identical bytes."""
+    if method == "GET":
+        route = GET_ROUTES.get(path)
+        if route is not None:
+            return route(raw)
+        service_route = _service_route(path)
+        if service_route is not None:
+            return _secret(*service_route)
+    elif method == "POST":
+        route = POST_ROUTES.get(path)
+        if route is not None:
+            return route(raw)
+    return 404, NOT_FOUND_BODY
 
 
 class Handler(BaseHTTPRequestHandler):
@@ -175,102 +363,62 @@ class Handler(BaseHTTPRequestHandler):
         return
 
     def do_POST(self) -> None:  # noqa: N802
-        if self.path == "/v1/auth/approle/login":
-            write_json(self, 200, {"auth": {"client_token": TOKEN}})
-            return
-        if self.path == "/control/set-version":
-            length = int(self.headers.get("Content-Length", "0"))
-            payload = json.loads(self.rfile.read(length).decode("utf-8"))
-            service = str(payload.get("service", "")).strip()
-            item = str(payload.get("item", "")).strip()
-            version = int(payload.get("version", 1))
-            if not service or item not in CONTROL_ITEMS or version < 1:
-                write_json(self, 400, {"error": "invalid control payload"})
-                return
-            versions[(service, item)] = version
-            write_json(self, 200, {"ok": True})
-            return
-        if self.path == "/control/fail-next":
-            length = int(self.headers.get("Content-Length", "0"))
-            payload = json.loads(self.rfile.read(length).decode("utf-8"))
-            service = str(payload.get("service", "")).strip()
-            item = str(payload.get("item", "")).strip()
-            count = int(payload.get("count", 1))
-            if not service or item not in CONTROL_ITEMS or count < 1:
-                write_json(self, 400, {"error": "invalid control payload"})
-                return
-            fail_next[(service, item)] = count
-            write_json(self, 200, {"ok": True})
-            return
-        if self.path == "/control/reset":
-            versions.clear()
-            fail_next.clear()
-            write_json(self, 200, {"ok": True})
-            return
-        write_json(self, 404, {"errors": ["not found"]})
+        length = int(self.headers.get("Content-Length", "0"))
+        write_body(self, *dispatch("POST", self.path, self.rfile.read(length)))
 
     def do_GET(self) -> None:  # noqa: N802
-        if self.path == "/v1/sys/health":
-            write_json(self, 200, {"initialized": True, "sealed": False})
-            return
-        match = SERVICE_PATH_PATTERN.match(self.path)
-        if match:
-            service = match.group(1)
-            secret_kind = match.group(2)
-            failure_key = (service, secret_kind)
-            if fail_next.get(failure_key, 0) > 0:
-                fail_next[failure_key] = fail_next[failure_key] - 1
-                write_json(self, 500, {"errors": [f"injected failure for {service}/{secret_kind}"]})
-                return
-            version = versions.get((service, secret_kind), 1)
-            if secret_kind == "secret_id":
-                write_json(
-                    self,
-                    200,
-                    {"data": {"data": {"secret_id": f"synced-secret-id-{service}-v{version}"}}},
-                )
-                return
-            if secret_kind == "eab":
-                write_json(
-                    self,
-                    200,
-                    {
-                        "data": {
-                            "data": {
-                                "kid": f"synced-kid-{service}-v{version}",
-                                "hmac": f"synced-hmac-{service}-v{version}",
-                            }
-                        }
-                    },
-                )
-                return
-            if secret_kind == "http_responder_hmac":
-                write_json(
-                    self,
-                    200,
-                    {"data": {"data": {"hmac": f"synced-responder-hmac-{service}-v{version}"}}},
-                )
-                return
-            if secret_kind == "trust":
-                pem, fingerprint = synthetic_trust_anchor(service, version)
-                write_json(
-                    self,
-                    200,
-                    {
-                        "data": {
-                            "data": {
-                                "trusted_ca_sha256": [fingerprint],
-                                "ca_bundle_pem": pem,
-                            }
-                        }
-                    },
-                )
-                return
-        write_json(self, 404, {"errors": ["not found"]})
+        write_body(self, *dispatch("GET", self.path, b""))
+
+
+def serve_async() -> None:
+    """Serves the same routes from an aiohttp event loop. aiohttp is
+    only imported here so the default stdlib server keeps working on
+    runners without it.
+
+    `dispatch` can block (a `trust` miss forks openssl, and the state
+    locks are `threading.Lock`s), so it runs in a worker thread rather
+    than on the loop. The loop's default executor is widened so a burst
+    of `trust` misses cannot occupy every worker and queue cache hits
+    behind them."""
+    try:
+        from aiohttp import web
+    except ImportError:
+        raise SystemExit("--async requires the aiohttp package") from None
+
+    async def handle(request: web.Request) -> web.Response:
+        raw = await request.read()
+        status, body = await asyncio.to_thread(dispatch, request.method, request.raw_path, raw)
+        return web.Response(status=status, body=body, content_type="application/json")
+
+    async def widen_executor(app: web.Application) -> None:
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=ASYNC_WORKERS)
+        )
+
+    app = web.Application()
+    app.on_startup.append(widen_executor)
+    app.router.add_route("GET", "/{tail:.*}", handle)
+    app.router.add_route("POST", "/{tail:.*}", handle)
+    web.run_app(app, host="127.0.0.1", port=PORT, print=None, access_log=None)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Mock OpenBao server for the docker harness")
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="serve from an aiohttp event loop instead of ThreadingHTTPServer",
+    )
+    return parser.parse_args()
 
 
 def main() -> None:
-    server = HTTPServer(("127.0.0.1", PORT), Handler)
+    args = parse_args()
+    if args.use_async:
+        serve_async()
+        return
+    server = ThreadingHTTPServer(("127.0.0.1", PORT), Handler)
     server.serve_forever()
 
 